@@ -3,26 +3,21 @@
 import sys
 import argparse
 
-parser = argparse.ArgumentParser()
-parser.add_argument('-d', '--debug', action='store_true',
-                    help='print debugging messages on stderr')
-cmdline = parser.parse_args()
-
-contexts = dict()
-running = dict()
-rss = 0
-maxrss = 0
-maxrunning = dict()
-
-memfree = None
-cached = None
-percpu = None
-pagesize = None
-sizeofpage = None
-
-try:
-    while True:
-        (category, data) = input().split(':', 1)
+def parse(lines, debug=False):
+    contexts = dict()
+    running = dict()
+    rss = 0
+    maxrss = 0
+    maxrunning = dict()
+
+    memfree = None
+    cached = None
+    percpu = None
+    pagesize = None
+    sizeofpage = None
+
+    for line in lines:
+        (category, _, data) = line.rstrip('\n').partition(':')
 
         if category == 'trace':
             index = data.rindex(': rss_stat: ')
@@ -31,7 +26,7 @@ try:
             size = None
             curr = False
             for field in data[index+12:].split():
-                (key, val) = field.split('=')
+                (key, _, val) = field.partition('=')
                 if key == 'mm_id':
                     mm = int(val)
                 elif key == 'curr':
@@ -71,41 +66,51 @@ try:
                 pass
 
         else:
-            if cmdline.debug:
+            if debug:
                 print('Unknown category: {}'.format(category),
                       file=sys.stderr)
 
-except EOFError:
-    pass
-
-if memfree is None:
-    print('Cannot determine MemFree', file=sys.stderr)
-    exit(1)
-
-if cached is None:
-    print('Cannot determine Cached', file=sys.stderr)
-    exit(1)
-
-if percpu is None:
-    print('Cannot determine Percpu', file=sys.stderr)
-    exit(1)
-
-if pagesize is None:
-    print('Cannot determine page size', file=sys.stderr)
-    exit(1)
-
-if sizeofpage is None:
-    print('Cannot determine sizeof(struct page)', file=sys.stderr)
-
-if cmdline.debug:
-    print('Max RSS processes:', file=sys.stderr)
-    for (mm, rss) in maxrunning.items():
-        desc = contexts.get(mm, 'mm_{}'.format(mm))
-        print('-', desc, rss, file=sys.stderr)
-
-print('PAGESIZE={:d}'.format(pagesize))
-print('SIZEOFPAGE={:d}'.format(sizeofpage))
-print('INIT_MEMFREE={:d}'.format(memfree))
-print('INIT_CACHED={:d}'.format(cached))
-print('PERCPU={:d}'.format(percpu))
-print('USER_BASE={:d}'.format(maxrss))
+    if memfree is None:
+        raise ValueError('Cannot determine MemFree')
+
+    if cached is None:
+        raise ValueError('Cannot determine Cached')
+
+    if percpu is None:
+        raise ValueError('Cannot determine Percpu')
+
+    if pagesize is None:
+        raise ValueError('Cannot determine page size')
+
+    if sizeofpage is None:
+        raise ValueError('Cannot determine sizeof(struct page)')
+
+    if debug:
+        print('Max RSS processes:', file=sys.stderr)
+        for (mm, rss) in maxrunning.items():
+            desc = contexts.get(mm, 'mm_{}'.format(mm))
+            print('-', desc, rss, file=sys.stderr)
+
+    return {
+        'PAGESIZE': pagesize,
+        'SIZEOFPAGE': sizeofpage,
+        'INIT_MEMFREE': memfree,
+        'INIT_CACHED': cached,
+        'PERCPU': percpu,
+        'USER_BASE': maxrss,
+    }
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser()
+    parser.add_argument('-d', '--debug', action='store_true',
+                        help='print debugging messages on stderr')
+    cmdline = parser.parse_args()
+
+    try:
+        results = parse(sys.stdin, cmdline.debug)
+    except ValueError as e:
+        print(e, file=sys.stderr)
+        exit(1)
+
+    for (key, val) in results.items():
+        print('{}={:d}'.format(key, val))
@@ -2,10 +2,17 @@
 
 import sys
 import os
+import asyncio
+import hashlib
+import json
+import mmap
 import subprocess
 import tempfile
 import shutil
 
+import kernel
+import maxrss
+
 params = dict()
 
 # Directory with scripts and other data
@@ -20,15 +27,22 @@ params['TOTAL_RAM'] = 1024 * 1024
 # Number of CPUs for the VM
 params['NUMCPUS'] = 2
 
-# Where kernel messages should go
-params['MESSAGES_LOG'] = 'messages.log'
+# Where kernel messages should go (QEMU pipe chardev base name)
+params['MESSAGES_LOG'] = 'messages'
+
+# Where trackrss log should go (QEMU pipe chardev base name)
+params['TRACKRSS_LOG'] = 'trackrss'
 
-# Where trackrss log should go
-params['TRACKRSS_LOG'] = 'trackrss.log'
+# Directory for cached results; caching is only enabled if
+# KDUMP_CALIBRATE_CACHE is set in the environment, because the key
+# does not cover the system tools that end up in the initrd
+params['CACHEDIR'] = os.path.join(
+    os.environ.get('XDG_CACHE_HOME') or os.path.expanduser('~/.cache'),
+    'kdump-calibrate')
 
 # Store the system architecture for convenience
-arch = os.uname()[4]
-params['ARCH'] = os.uname()[4]
+arch = os.uname().machine
+params['ARCH'] = arch
 
 if arch == "i386" or arch == "i586" or arch == "i686" or arch == "x86_64":
     image="vmlinuz"
@@ -55,42 +69,101 @@ else:
     # end of RAM.
     ADDR_ELFCOREHDR = 768 * 1024 * 1024
 
-def install_kdump_init(bindir):
-    env = os.environ.copy()
-    env['DESTDIR'] = os.path.abspath('.')
+# Environment for child processes; copied only once
+BASE_ENV = os.environ.copy()
+
+# System dracut executable; looked up in PATH only once
+DRACUT = shutil.which('dracut')
+
+def spawn(args, env=BASE_ENV, stdout=None):
+    # Like subprocess.call(), but without the subprocess module overhead
+    file_actions = []
+    if stdout is not None:
+        file_actions.append((os.POSIX_SPAWN_DUP2, stdout.fileno(), 1))
+    pid = os.posix_spawnp(args[0], args, env, file_actions=file_actions)
+    return os.waitstatus_to_exitcode(os.waitpid(pid, 0)[1])
+
+async def run_command(args, check=False, input=None, **kwargs):
+    proc = await asyncio.create_subprocess_exec(*args, **kwargs)
+    try:
+        await proc.communicate(input)
+    except asyncio.CancelledError:
+        # Do not leave the child running when the other VM run failed
+        try:
+            proc.kill()
+        except ProcessLookupError:
+            pass
+        await proc.wait()
+        raise
+    ret = proc.returncode
+    if check and ret:
+        raise subprocess.CalledProcessError(ret, args)
+    return ret
+
+def install_kdump_init(bindir, destdir):
+    env = { **BASE_ENV, 'DESTDIR': destdir }
     args = (
         'cmake',
         '--install', os.path.join(bindir, '..', 'dracut'),
     )
-    subprocess.call(args, env=env, stdout=sys.stderr)
+    spawn(args, env=env, stdout=sys.stderr)
 
 def init_local_dracut(params):
     basedir = params['DRACUTDIR']
-    os.symlink(shutil.which('dracut'), 'dracut')
-    for name in os.listdir(basedir):
-        if name == 'modules.d':
-            os.mkdir(name)
-            for module in os.listdir(os.path.join(basedir, name)):
-                dst = os.path.join(name, module)
-                if module[2:] != 'kdump':
-                    os.symlink(os.path.join(basedir, dst), dst)
-
-            dst = os.path.join(name, '99kdump')
-            os.symlink(os.path.join('..', basedir[1:], dst), dst)
-        else:
-            os.symlink(os.path.join(basedir, name), name)
+    os.symlink(DRACUT, 'dracut')
+    with os.scandir(basedir) as entries:
+        for entry in entries:
+            if entry.name == 'modules.d':
+                os.mkdir(entry.name)
+                dir_fd = os.open(entry.name, os.O_RDONLY | os.O_DIRECTORY)
+                try:
+                    with os.scandir(entry.path) as modules:
+                        for module in modules:
+                            if module.name[2:] != 'kdump':
+                                os.symlink(module.path, module.name,
+                                           dir_fd=dir_fd)
+
+                    src = os.path.join('..', basedir[1:], entry.name, '99kdump')
+                    os.symlink(src, '99kdump', dir_fd=dir_fd)
+                finally:
+                    os.close(dir_fd)
+            else:
+                os.symlink(entry.path, entry.name)
+
+def copy_executable(src, dst):
+    # Copy the file in the kernel and create dst executable right away,
+    # so there is no need for a separate copymode() stat + chmod
+    with open(src, 'rb') as f:
+        size = os.fstat(f.fileno()).st_size
+        fd = os.open(dst, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o755)
+        try:
+            offset = 0
+            while offset < size:
+                sent = os.sendfile(fd, f.fileno(), offset, size - offset)
+                if not sent:
+                    raise OSError('Short copy of {} to {}: {} of {} bytes'
+                                  .format(src, dst, offset, size))
+                offset += sent
+        finally:
+            os.close(fd)
 
 class build_initrd(object):
-    def __init__(self, bindir, params, config, path='test-initrd'):
-        # First, create the base initrd using dracut:
-        env = os.environ.copy()
-        env['KDUMP_LIBDIR'] = os.path.abspath(params['SCRIPTDIR'] + "/..")
-        env['KDUMP_CONF'] = os.path.join(params['SCRIPTDIR'], config)
-        env['DRACUT_PATH'] = ' '.join((
-            '/sbin',
-            '/bin',
-            '/usr/sbin',
-            '/usr/bin'))
+    def __init__(self, bindir, params, config, workdir, path='test-initrd'):
+        self.bindir = bindir
+        self.workdir = workdir
+        self.cpio = os.path.join(workdir, path)
+        self.path = self.cpio + os.path.extsep + 'xz'
+
+        env = {
+            **BASE_ENV,
+            'KDUMP_LIBDIR': os.path.dirname(params['SCRIPTDIR']),
+            'KDUMP_CONF': os.path.join(params['SCRIPTDIR'], config),
+            'DRACUT_PATH': ' '.join((
+                '/sbin',
+                '/bin',
+                '/usr/sbin',
+                '/usr/bin')),
+        }
 
         if params['NET']:
             netdrivers = [ 'af_packet' ]
@@ -102,7 +175,7 @@ class build_initrd(object):
         else:
             extra_args = ()
         args = (
-            os.path.abspath('dracut'),
+            os.path.join(params['TMPDIR'], 'dracut'),
             '--local',
             '--hostonly',
             '--no-hostonly-default-device',
@@ -118,26 +191,32 @@ class build_initrd(object):
             # Additional options:
             *extra_args,
 
-            path,
+            self.cpio,
             params['KERNELVER'],
         )
-        subprocess.call(args, env=env, stdout=sys.stderr)
+        self.dracut_args = args
+        self.env = env
+
+    async def build(self):
+        # First, create the base initrd using dracut:
+        await run_command(self.dracut_args, env=self.env, stdout=sys.stderr)
 
         # Replace /init with trackrss:
-        trackrss = os.path.join(bindir, 'trackrss')
-        shutil.copy(trackrss, './init')
+        trackrss = os.path.join(self.bindir, 'trackrss')
+        copy_executable(trackrss, os.path.join(self.workdir, 'init'))
         args =(
             'cpio', '-o',
             '-H', 'newc',
             '--owner=0:0',
-            '--append', '--file=' + path,
+            '--append', '--file=' + self.cpio,
         )
-        with subprocess.Popen(args, stdin=subprocess.PIPE) as p:
-            p.communicate(b'init')
+        await run_command(args, input=b'init',
+                          stdin=subprocess.PIPE, cwd=self.workdir)
 
-        # Compress the result:
-        subprocess.call(('xz', '-f', '-0', '--check=crc32', path))
-        self.path = path + os.path.extsep + 'xz'
+        # Compress the result (do not skip this: the size of the initrd
+        # image freed after unpacking is part of KERNEL_INIT):
+        await run_command(
+            ('xz', '-T0', '-f', '-0', '--check=crc32', self.cpio))
 
 class build_elfcorehdr(object):
     def __init__(self, bindir, addr, path='elfcorehdr.bin'):
@@ -150,24 +229,60 @@ class build_elfcorehdr(object):
             path,
             str(addr),
         )
-        subprocess.call(args)
+        spawn(args)
 
         self.size = (os.stat(self.path).st_size + 1023) // 1024
 
+# Kernel command line options common to all VM runs
+BASE_KERNEL_ARGS = (
+    'panic=1',
+    'nokaslr',
+    'root=kdump',
+    'rootflags=bind',
+    'rd.shell=0',
+    'rd.emergency=poweroff',
+)
+
+# Machine names which differ from the QEMU system emulator suffix
+QEMU_MACHINES = {
+    'aarch64_be': 'aarch64',
+    'armv8b': 'arm',
+    'armv8l': 'arm',
+    'i586': 'i386',
+    'i686': 'i386',
+    'ppcle': 'ppc',
+    'ppc64le': 'ppc64',
+}
+
 def qemu_name(machine):
-    if machine == 'aarch64_be':
-        machine = 'aarch64'
-    elif machine == 'armv8b' or machine == 'armv8l':
-        machine = 'arm'
-    if machine == 'i586' or machine == 'i686':
-        machine = 'i386'
-    if machine == 'ppcle':
-        machine = 'ppc'
-    elif machine == 'ppc64le':
-        machine = 'ppc64'
-    return 'qemu-system-' + machine
-
-def run_qemu(bindir, params, initrd, elfcorehdr):
+    return 'qemu-system-' + QEMU_MACHINES.get(machine, machine)
+
+def make_log_pipe(path):
+    # QEMU pipe chardevs use path.in for input and path.out for output
+    os.mkfifo(path + '.in')
+    os.mkfifo(path + '.out')
+    # Hold a write end until QEMU exits, so the reader neither blocks
+    # in open() nor sees EOF before QEMU has opened the pipe
+    return os.open(path + '.out', os.O_RDWR)
+
+def echo_lines(lines):
+    # Copy the log to stderr for debugging possible problems inside the VM
+    for line in lines:
+        sys.stderr.write(line)
+        yield line
+
+def parse_log_pipe(path, parse):
+    # Returns when all writers have closed the pipe
+    with open(path + '.out', errors='replace') as f:
+        try:
+            return parse(echo_lines(f))
+        except Exception:
+            # Keep draining the pipe, or QEMU blocks once it is full
+            for line in f:
+                sys.stderr.write(line)
+            raise
+
+async def run_qemu(bindir, params, initrd, elfcorehdr):
     arch = params['ARCH']
     extra_qemu_args = []
     extra_kernel_args = []
@@ -186,28 +301,28 @@ def run_qemu(bindir, params, initrd, elfcorehdr):
     if arch == 'aarch64':
         console_args = (
             '-serial', 'null',  # ttyAMA0 (used for OVMF debug messages)
-            '-chardev', 'file,path={},id=ttyS0'.format(params['MESSAGES_LOG']),
-            '-chardev', 'file,path={},id=ttyS1'.format(params['TRACKRSS_LOG']),
+            '-chardev', 'pipe,path={},id=ttyS0'.format(params['MESSAGES_LOG']),
+            '-chardev', 'pipe,path={},id=ttyS1'.format(params['TRACKRSS_LOG']),
             '-device', 'pci-serial-2x,chardev1=ttyS0,chardev2=ttyS1',
             )
     elif arch.startswith('s390'):
         console_args = (
-            '-serial', 'file:' + params['MESSAGES_LOG'],
+            '-serial', 'pipe:' + params['MESSAGES_LOG'],
             '-device', 'virtio-serial-ccw',
-            '-chardev', 'file,path={},id=hvc0'.format(params['TRACKRSS_LOG']),
+            '-chardev', 'pipe,path={},id=hvc0'.format(params['TRACKRSS_LOG']),
             '-device', 'virtconsole,nr=0,chardev=hvc0',
             )
     else:
         console_args = (
-            '-serial', 'file:' + params['MESSAGES_LOG'],
-            '-serial', 'file:' + params['TRACKRSS_LOG'],
+            '-serial', 'pipe:' + params['MESSAGES_LOG'],
+            '-serial', 'pipe:' + params['TRACKRSS_LOG'],
         )
 
     qemu_ram = params['TOTAL_RAM']
     # Set up ELF core headers
     if arch.startswith('s390'):
         S390_OLDMEM_BASE = 0x10418 # cf. struct parmarea
-        oldmem = 'oldmem.bin'
+        oldmem = os.path.join(initrd.workdir, 'oldmem.bin')
         oldmem_size = 0
         oldmem_base = 0
         with open(oldmem, 'wb') as f:
@@ -219,8 +334,8 @@ def run_qemu(bindir, params, initrd, elfcorehdr):
         ))
     else:
         extra_kernel_args.append(
-            'elfcorehdr=0x{0:x} crashkernel={1:d}K@0x{0:x}'.format(
-                elfcorehdr.address, elfcorehdr.size))
+            f'elfcorehdr=0x{elfcorehdr.address:x} '
+            f'crashkernel={elfcorehdr.size:d}K@0x{elfcorehdr.address:x}')
 
     # Kernel and QEMU arguments to congifure network
     if params['NET']:
@@ -233,7 +348,7 @@ def run_qemu(bindir, params, initrd, elfcorehdr):
             '-nic', 'user,mac={},model={}'.format(mac, model)
         ))
         extra_kernel_args.extend((
-            'ifname=kdump0:{}'.format(mac),
+            f'ifname=kdump0:{mac}',
             'bootdev=kdump0',
             'ip=192.168.0.2::192.168.0.1:255.255.255.0::kdump0:none'
         ))
@@ -246,16 +361,11 @@ def run_qemu(bindir, params, initrd, elfcorehdr):
             '-bios', '/usr/share/qemu/qemu-uefi-aarch64.bin',
         ))
     kernel_args = (
-        'panic=1',
-        'nokaslr',
-        'console={}'.format(console),
-        'root=kdump',
-        'rootflags=bind',
-	'rd.shell=0',
-	'rd.emergency=poweroff',
+        f'console={console}',
+        *BASE_KERNEL_ARGS,
         *extra_kernel_args,
         '--',
-        'trackrss={}'.format(logdev),
+        f'trackrss={logdev}',
     )
     qemu_args = (
         qemu_name(arch),
@@ -272,44 +382,34 @@ def run_qemu(bindir, params, initrd, elfcorehdr):
         *extra_qemu_args,
     )
 
-    # create the log files and monitor them with tail -f 
-    # (redirected to stderr)
-    # for debugging possible problems inside the VM
-    f = open(params['MESSAGES_LOG'], "w")
-    f.close()
-    tail_messages = subprocess.Popen(["tail", "-f", params['MESSAGES_LOG']], stdout=2)
-    
-    f = open(params['TRACKRSS_LOG'], "w")
-    f.close()
-    tail_trackrss = subprocess.Popen(["tail", "-f", params['TRACKRSS_LOG']], stdout=2)
-
-    
-    result = subprocess.run(qemu_args, stdout=sys.stderr, stderr=sys.stderr, check=True)
-    if not result.returncode:
-        print("qemu result: ", result, file=sys.stderr)
-
-    tail_messages.kill()
-    tail_trackrss.kill()
-
-    results = dict()
-
+    # Parse the logs while the VM is running
+    loop = asyncio.get_running_loop()
+    messages_fd = make_log_pipe(params['MESSAGES_LOG'])
+    trackrss_fd = make_log_pipe(params['TRACKRSS_LOG'])
     # Get kernel-space requirements
-    script = os.path.join(params['SCRIPTDIR'], 'kernel.py')
-    with subprocess.Popen(script,
-                          stdin=open(params['MESSAGES_LOG']),
-                          stdout=subprocess.PIPE) as p:
-        for line in p.communicate()[0].decode().splitlines():
-            (key, val) = line.strip().split('=')
-            results[key] = int(val)
-
+    messages = loop.run_in_executor(
+        None, parse_log_pipe, params['MESSAGES_LOG'], kernel.parse)
     # Get user-space requirements
-    script = os.path.join(params['SCRIPTDIR'], 'maxrss.py')
-    with subprocess.Popen(script,
-                          stdin=open(params['TRACKRSS_LOG']),
-                          stdout=subprocess.PIPE) as p:
-        for line in p.communicate()[0].decode().splitlines():
-            (key, val) = line.strip().split('=')
-            results[key] = int(val)
+    trackrss = loop.run_in_executor(
+        None, parse_log_pipe, params['TRACKRSS_LOG'], maxrss.parse)
+
+    try:
+        ret = await run_command(qemu_args, check=True,
+                                stdout=sys.stderr, stderr=sys.stderr)
+        print("qemu returned: ", ret, file=sys.stderr)
+    finally:
+        os.close(messages_fd)
+        os.close(trackrss_fd)
+        # QEMU is gone, so the readers get EOF now; always wait for them,
+        # but if QEMU failed, its error is the one to report
+        logs = await asyncio.gather(messages, trackrss,
+                                    return_exceptions=True)
+
+    results = dict()
+    for log in logs:
+        if isinstance(log, Exception):
+            raise log
+        results.update(log)
 
     kernel_base = params['TOTAL_RAM'] - results['INIT_MEMFREE']
     # The above also includes the unpacked initramfs, which should be separate
@@ -326,33 +426,146 @@ def run_qemu(bindir, params, initrd, elfcorehdr):
 
     return results
 
+async def run_one(bindir, params, config, elfcorehdr, slots):
+    # Each VM gets its own work directory, so concurrent runs do not
+    # overwrite each other's initrd and log files.
+    async with slots:
+        with tempfile.TemporaryDirectory(dir=params['TMPDIR']) as workdir:
+            params = dict(params)
+            params['MESSAGES_LOG'] = os.path.join(workdir,
+                                                  params['MESSAGES_LOG'])
+            params['TRACKRSS_LOG'] = os.path.join(workdir,
+                                                  params['TRACKRSS_LOG'])
+            initrd = build_initrd(bindir, params, config, workdir)
+            await initrd.build()
+            return await run_qemu(bindir, params, initrd, elfcorehdr)
+
+async def run_all(bindir, params, elfcorehdr):
+    # Boot the VMs concurrently, but do not start more of them than
+    # there are host CPUs to back their virtual CPUs.
+    maxvms = max(1, (os.cpu_count() or 1) // params['NUMCPUS'])
+    slots = asyncio.Semaphore(maxvms)
+    # If one run fails, asyncio.run() cancels the other one. Its
+    # run_command() kills the child and run_qemu() joins the log
+    # readers before the CancelledError is passed on unchanged, so
+    # the work directory is not removed under a running process.
+    return await asyncio.gather(
+        run_one(bindir, dict(params, NET=False), 'dummy.conf',
+                elfcorehdr, slots),
+        run_one(bindir, dict(params, NET=True), 'dummy-net.conf',
+                elfcorehdr, slots),
+    )
+
 def calc_diff(src, dst, key, diffkey):
     src[diffkey] = max(0, dst[key] - src[key])
 
-with subprocess.Popen(('get_kernel_version', params['KERNEL']),
-                      stdout=subprocess.PIPE) as p:
-    params['KERNELVER'] = p.communicate()[0].decode().strip()
-
-with tempfile.TemporaryDirectory() as tmpdir:
-    oldcwd = os.getcwd()
-    os.chdir(tmpdir)
-    elfcorehdr = build_elfcorehdr(oldcwd, ADDR_ELFCOREHDR)
+def calibrate(bindir, params):
+    # Temporary directories are always created with an absolute path
+    with tempfile.TemporaryDirectory() as tmpdir:
+        params['TMPDIR'] = tmpdir
+        os.chdir(tmpdir)
+        elfcorehdr = build_elfcorehdr(bindir, ADDR_ELFCOREHDR,
+                                      os.path.join(tmpdir, 'elfcorehdr.bin'))
 
-    install_kdump_init(oldcwd)
-    init_local_dracut(params)
+        install_kdump_init(bindir, tmpdir)
+        init_local_dracut(params)
 
-    params['NET'] = False
-    initrd = build_initrd(oldcwd, params, 'dummy.conf')
-    results = run_qemu(oldcwd, params, initrd, elfcorehdr)
+        (results, netresults) = asyncio.run(
+            run_all(bindir, params, elfcorehdr))
+        os.chdir(bindir)
 
-    params['NET'] = True
-    initrd = build_initrd(oldcwd, params, 'dummy-net.conf')
-    netresults = run_qemu(oldcwd, params, initrd, elfcorehdr)
-    os.chdir(oldcwd)
+    calc_diff(results, netresults, 'KERNEL_INIT', 'INIT_NET')
+    calc_diff(results, netresults, 'INIT_CACHED', 'INIT_CACHED_NET')
+    calc_diff(results, netresults, 'USER_BASE', 'USER_NET')
+    return results
 
-calc_diff(results, netresults, 'KERNEL_INIT', 'INIT_NET')
-calc_diff(results, netresults, 'INIT_CACHED', 'INIT_CACHED_NET')
-calc_diff(results, netresults, 'USER_BASE', 'USER_NET')
+def cache_key(bindir, params):
+    h = hashlib.sha256()
+    st = os.stat(params['KERNEL'])
+    for val in (params['ARCH'], params['KERNEL'], params['KERNELVER'],
+                st.st_size, st.st_mtime_ns, ADDR_ELFCOREHDR,
+                params['TOTAL_RAM'], params['NUMCPUS']):
+        h.update('{}\n'.format(val).encode())
+
+    # Calibration tools, scripts and the kdump dracut module
+    paths = [ os.path.join(bindir, 'trackrss'),
+              os.path.join(bindir, 'mkelfcorehdr') ]
+    for name in ('dummy.conf', 'dummy-net.conf',
+                 'kernel.py', 'maxrss.py', 'run-qemu.py'):
+        paths.append(os.path.join(params['SCRIPTDIR'], name))
+    dracutdir = os.path.join(os.path.dirname(params['SCRIPTDIR']), 'dracut')
+    with os.scandir(dracutdir) as it:
+        paths.extend(sorted(e.path for e in it if e.is_file()))
+    for path in paths:
+        with open(path, 'rb') as f:
+            h.update(f.read())
+    return h.hexdigest()
+
+def load_cache(path):
+    try:
+        with open(path) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+def save_cache(path, results):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmppath = path + '.tmp'
+    with open(tmppath, 'w') as f:
+        json.dump(results, f)
+    os.replace(tmppath, path)
+
+def find_kernel_version(image):
+    # x86 boot protocol: the setup header points to the version string
+    if (image[0x202:0x206] == b'HdrS' and
+        int.from_bytes(image[0x206:0x208], 'little') >= 0x200):
+        off = int.from_bytes(image[0x20e:0x210], 'little')
+        if off:
+            off += 0x200
+            words = image[off:image.find(b'\0', off)].split(maxsplit=1)
+            if words:
+                return words[0].decode()
+
+    # Uncompressed kernels contain the Linux banner
+    banner = b'Linux version '
+    off = image.find(banner)
+    while off >= 0:
+        off += len(banner)
+        words = image[off:off + 256].split(maxsplit=1)
+        if words and not words[0].startswith(b'%'):
+            return words[0].decode()
+        off = image.find(banner, off)
+
+    return None
+
+def get_kernel_version(path):
+    # Avoid running get_kernel_version for the common image formats
+    try:
+        with open(path, 'rb') as f, \
+             mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as image:
+            version = find_kernel_version(image)
+            if version:
+                return version
+    except (OSError, ValueError):
+        pass
+
+    # Compressed images etc.
+    with subprocess.Popen(('get_kernel_version', path),
+                          stdout=subprocess.PIPE, bufsize=-1, text=True) as p:
+        return p.communicate()[0].strip()
+
+params['KERNELVER'] = get_kernel_version(params['KERNEL'])
+
+bindir = os.getcwd()
+if BASE_ENV.get('KDUMP_CALIBRATE_CACHE'):
+    cachefile = os.path.join(params['CACHEDIR'],
+                             cache_key(bindir, params) + '.json')
+    results = load_cache(cachefile)
+    if results is None:
+        results = calibrate(bindir, params)
+        save_cache(cachefile, results)
+else:
+    results = calibrate(bindir, params)
 
 keys = (
     'KERNEL_BASE',
@@ -366,5 +579,4 @@ keys = (
     'INIT_CACHED_NET',
     'USER_NET',
 )
-for key in keys:
-    print('{}={:d}'.format(key, results[key]))
+sys.stdout.write(''.join(f'{key}={results[key]:d}\n' for key in keys))